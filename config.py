@@ -8,6 +8,19 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
+
+def _webhook_port_from_env(default: int = 8443) -> int:
+    """Read the webhook port from PORT, falling back to the default if it isn't a number"""
+    value = os.getenv('PORT', '')
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        print(f"WARNING: PORT={value!r} is not a number, using {default} for the webhook")
+        return default
+
+
 class Config:
     """Configuration class for the whale tracker"""
     
@@ -34,6 +47,22 @@ class Config:
     # How often to check for position changes (in seconds)
     POLLING_INTERVAL = 10
     
+    # How long a user_state lookup for an address is reused by /check (in seconds)
+    # Kept below POLLING_INTERVAL so checks are never staler than alerts
+    CHECK_CACHE_TTL = 8
+    
+    # Maximum number of addresses checked at once by utils.py test commands
+    ADDRESS_CHECK_CONCURRENCY = 8
+    
+    # Request rate limit for those checks; Hyperliquid allows 1200 request
+    # weight per minute per IP and a user_state query weighs 2, so 5/s uses
+    # half the budget and leaves the rest for the tracker on the same IP
+    INFO_REQUESTS_PER_SECOND = 5
+    
+    # Give up on a single address check after this long (in seconds), including
+    # rate limit waits and retries
+    ADDRESS_CHECK_TIMEOUT = 20
+    
     # Minimum position size to track (in USD)
     MIN_POSITION_SIZE = 1000
     
@@ -44,6 +73,11 @@ class Config:
     LOG_LEVEL = "INFO"  # DEBUG, INFO, WARNING, ERROR
     LOG_FILE = "whale_tracker.log"
     
+    # Development: log any event loop callback that blocks for longer than
+    # ASYNC_SLOW_CALLBACK_MS (uses asyncio debug mode)
+    DEBUG_ASYNC = os.getenv('DEBUG_ASYNC', 'False').lower() == 'true'
+    ASYNC_SLOW_CALLBACK_MS = 10
+    
     # Data Storage
     # Directory to store position data
     DATA_DIR = "data"
@@ -58,10 +92,28 @@ class Config:
     TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN', '')
     TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID', '')
     
+    # How the command handler receives updates: "polling" or "webhook"
+    # Webhook mode needs a public HTTPS URL that forwards to WEBHOOK_PORT
+    TELEGRAM_MODE = os.getenv('TELEGRAM_MODE', 'polling').lower()
+    WEBHOOK_BASE = os.getenv('WEBHOOK_BASE', '').rstrip('/')
+    # Only parsed in webhook mode, so a stray PORT can't break polling or the tracker
+    WEBHOOK_PORT = _webhook_port_from_env() if TELEGRAM_MODE == 'webhook' else 8443
+    # Telegram sends this in every webhook request so forged updates can be
+    # rejected; a random secret is generated per run when it's not set
+    WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET', '')
+    
     # Telegram message settings
     TELEGRAM_SEND_SUMMARY = True  # Send daily summary
     TELEGRAM_SEND_POSITION_CHANGES = True  # Send individual position changes
     
+    # Maximum number of concurrent sends when broadcasting to all users
+    # The HTTP connection pool is sized from this value
+    TELEGRAM_BROADCAST_CONCURRENCY = 25
+    
+    # Global send rate across all workers; Telegram allows about 30 messages
+    # per second before answering with 429 flood-control errors
+    TELEGRAM_MAX_MESSAGES_PER_SECOND = 30
+    
     @classmethod
     def validate_config(cls) -> bool:
         """Validate the configuration settings"""
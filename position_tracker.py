@@ -85,6 +85,11 @@ class HyperliquidTracker:
         # Initialize Telegram notifier
         self.telegram_notifier = get_telegram_notifier()
         
+        # Addresses to monitor - kept up to date by _sync_tracked_addresses
+        # instead of rebuilding the full list every polling cycle
+        self.tracked_addresses: List[str] = self.telegram_notifier.get_all_tracked_addresses()
+        self.address_events = self.telegram_notifier.subscribe_address_events()
+        
         # Storage for current positions
         # Format: {address: {symbol: Position}}
         self.current_positions: Dict[str, Dict[str, Position]] = {}
@@ -143,8 +148,8 @@ class HyperliquidTracker:
                 self.logger.error(f"Error loading positions: {e}")
                 self.current_positions = {}
     
-    def _save_positions(self):
-        """Save current positions to file"""
+    async def _save_positions(self):
+        """Save current positions to file without blocking the event loop"""
         try:
             # Convert Position objects to dictionaries for JSON serialization
             data = {}
@@ -153,12 +158,18 @@ class HyperliquidTracker:
                 for symbol, position in positions.items():
                     data[address][symbol] = position.to_dict()
             
-            with open(self.config.POSITIONS_FILE, 'w') as f:
-                json.dump(data, f, indent=2)
+            # Serialize here, write the file in a worker thread
+            content = json.dumps(data, indent=2)
+            await asyncio.to_thread(self._write_positions_file, content)
                 
         except Exception as e:
             self.logger.error(f"Error saving positions: {e}")
     
+    def _write_positions_file(self, content: str):
+        """Write serialized positions to file (blocking)"""
+        with open(self.config.POSITIONS_FILE, 'w') as f:
+            f.write(content)
+    
     async def initialize(self):
         """Initialize the Hyperliquid connection"""
         if self.test_mode:
@@ -194,7 +205,7 @@ class HyperliquidTracker:
         """Test the API connection"""
         try:
             # Try to get general info to test connection
-            meta = self.info_client.meta()
+            meta = await asyncio.to_thread(self.info_client.meta)
             self.logger.info("API connection test successful")
         except Exception as e:
             self.logger.error(f"API connection test failed: {e}")
@@ -208,8 +219,9 @@ class HyperliquidTracker:
             return self._get_test_positions(address)
             
         try:
-            # Get user state from Hyperliquid API
-            user_state = self.info_client.user_state(address)
+            # Get user state from Hyperliquid API; the SDK call is blocking, so run
+            # it in a worker thread to keep alerts flowing on the event loop
+            user_state = await asyncio.to_thread(self.info_client.user_state, address)
             
             positions = {}
             
@@ -330,7 +342,7 @@ class HyperliquidTracker:
         changes = []
         
         # Get all symbols from both old and new positions
-        all_symbols = set(old_positions.keys()) | set(new_positions.keys())
+        all_symbols = old_positions.keys() | new_positions.keys()
         
         for symbol in all_symbols:
             old_pos = old_positions.get(symbol)
@@ -410,14 +422,54 @@ class HyperliquidTracker:
         
         return f"Position change: {change.change_type}"
     
+    def _sync_tracked_addresses(self):
+        """Apply address additions/removals made since the last cycle"""
+        # Fast path: /add and /remove handled by this same process arrive as events
+        while True:
+            try:
+                action, address, label = self.address_events.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            
+            if action == "add":
+                self._start_tracking(address, label)
+            elif action == "remove":
+                self._stop_tracking(address, label)
+        
+        # The command handler normally runs as its own process (systemd,
+        # docker-compose, start_whale_tracker.sh), so its changes only reach
+        # the tracker through dynamic_addresses.json
+        if self.telegram_notifier.reload_dynamic_addresses_if_changed():
+            labels = self.telegram_notifier.get_all_address_labels()
+            for address in [a for a in self.tracked_addresses if a not in labels]:
+                self._stop_tracking(address)
+            for address, label in labels.items():
+                self._start_tracking(address, label)
+    
+    def _start_tracking(self, address: str, label: str):
+        """Add an address to the monitored list if it isn't there yet"""
+        if address not in self.tracked_addresses:
+            self.tracked_addresses.append(address)
+            self.logger.info(f"➕ Now tracking {label} ({address})")
+    
+    def _stop_tracking(self, address: str, label: Optional[str] = None):
+        """Remove an address from the monitored list and forget its positions"""
+        if address in self.tracked_addresses:
+            self.tracked_addresses.remove(address)
+            self.current_positions.pop(address, None)
+            if label:
+                self.logger.info(f"➖ Stopped tracking {label} ({address})")
+            else:
+                self.logger.info(f"➖ Stopped tracking {address}")
+    
     async def check_all_addresses(self):
         """Check all tracked addresses for position changes"""
         all_changes = []
         
-        # Get all addresses including dynamically added ones
-        all_addresses = self.telegram_notifier.get_all_tracked_addresses()
+        # Pick up addresses added/removed since the last cycle
+        self._sync_tracked_addresses()
         
-        for address in all_addresses:
+        for address in list(self.tracked_addresses):
             try:
                 # Get current positions
                 new_positions = await self.get_user_positions(address)
@@ -439,12 +491,12 @@ class HyperliquidTracker:
         # Handle initial sync
         if self.is_initial_sync:
             total_positions = sum(len(positions) for positions in self.current_positions.values())
-            total_addresses = len(self.telegram_notifier.get_all_tracked_addresses())
+            total_addresses = len(self.tracked_addresses)
             
             self.logger.info("🔄 Initial sync completed - positions loaded from live data")
             self.logger.info(f"📊 Tracking {total_positions} positions across {total_addresses} addresses")
             self.is_initial_sync = False  # Enable notifications for subsequent checks
-            self._save_positions()  # Save the initial state
+            await self._save_positions()  # Save the initial state
             return []  # Don't send notifications for initial sync
         
         # Process and display changes for regular monitoring
@@ -473,7 +525,7 @@ class HyperliquidTracker:
                 self.logger.warning(f"⚠️ Telegram notifications disabled - alerts:{self.config.ENABLE_TELEGRAM_ALERTS}, enabled:{self.telegram_notifier.enabled}")
             
             # Save updated positions
-            self._save_positions()
+            await self._save_positions()
         
         return all_changes
     
@@ -485,7 +537,7 @@ class HyperliquidTracker:
         self.logger.info("Starting position monitoring...")
         
         # Get total addresses including dynamic ones
-        total_addresses = len(self.telegram_notifier.get_all_tracked_addresses())
+        total_addresses = len(self.tracked_addresses)
         static_addresses = len(self.config.TRACKED_ADDRESSES)
         dynamic_addresses = total_addresses - static_addresses
         
@@ -532,6 +584,9 @@ class HyperliquidTracker:
                     await self.telegram_notifier.send_shutdown_message()
                 except Exception as e:
                     self.logger.error(f"Failed to send shutdown notification: {e}")
+            
+            # Save blocked users removed during this run
+            await self.telegram_notifier.stop_user_persistence()
     
     async def _run_test_monitoring(self):
         """Run monitoring in test mode with simulated data"""
@@ -3,18 +3,27 @@ Telegram Bot module for sending whale tracking notifications
 """
 
 import asyncio
+import functools
 import logging
+import itertools
 import json
 import os
 import random
-from typing import List, Optional, Dict, Any
+import re
+import tempfile
+import threading
+import time
+from types import MappingProxyType
+from typing import List, Optional, Dict, Any, Set, Mapping, Tuple, Callable, Awaitable
 from datetime import datetime, timedelta
 from decimal import Decimal
 
 try:
     from telegram import Bot, Update
     from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
-    from telegram.error import TelegramError, TimedOut, NetworkError
+    from telegram.error import (
+        TelegramError, TimedOut, NetworkError, BadRequest, Forbidden, InvalidToken, RetryAfter
+    )
     from telegram.constants import ParseMode
     from telegram.request import HTTPXRequest
     TELEGRAM_AVAILABLE = True
@@ -31,10 +40,132 @@ except ImportError:
     TelegramError = Exception
     TimedOut = Exception
     NetworkError = Exception
+    BadRequest = Exception
+    Forbidden = Exception
+    InvalidToken = Exception
+    RetryAfter = Exception
     HTTPXRequest = None
 
+try:
+    import h2  # noqa: F401 - enables HTTP/2 support in httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 from config import Config
 
+# Telegram rejects text messages longer than this (characters after entity parsing)
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096
+
+# Seconds to wait after an address change before writing the file, so bursts
+# of changes are saved in a single write
+DYNAMIC_ADDRESSES_FLUSH_DELAY = 2.0
+
+# Same for the user list, which every command touches via add_user
+USER_CHAT_IDS_FLUSH_DELAY = 2.0
+
+# Ethereum-style address: 0x followed by 40 hex characters
+_ADDR_RE = re.compile(r"^0x[0-9a-fA-F]{40}\Z")
+
+# Send queue priorities (lower values are sent first)
+PRIORITY_HIGH = 0  # Position change alerts
+PRIORITY_LOW = 1   # Broadcasts: startup, summaries, address notifications
+
+
+@functools.lru_cache(maxsize=2048)
+def short_address_label(address: str) -> str:
+    """Fallback label for an address without one, e.g. 0x1234...abcd"""
+    return f"{address[:6]}...{address[-4:]}"
+
+
+def _format_opened(change: Any) -> tuple:
+    """Emoji, action, details and side for an opened position"""
+    details = f"${change.change_amount:,.2f} @ ${change.new_position.entry_price}"
+    return "🟢", "OPENED", details, change.new_position.side.upper()
+
+
+def _format_closed(change: Any) -> tuple:
+    """Emoji, action, details and side for a closed position"""
+    pnl = change.old_position.unrealized_pnl
+    details = f"${change.change_amount:,.2f}\nPnL: ${pnl:+,.2f}"
+    return "🔴", "CLOSED", details, change.old_position.side.upper()
+
+
+def _format_increased(change: Any) -> tuple:
+    """Emoji, action, details and side for an increased position"""
+    details = f"+${change.change_amount:,.2f}\nTotal: ${change.new_position.market_value:,.2f}"
+    return "📈", "INCREASED", details, change.new_position.side.upper()
+
+
+def _format_decreased(change: Any) -> tuple:
+    """Emoji, action, details and side for a decreased position"""
+    details = f"-${change.change_amount:,.2f}\nTotal: ${change.new_position.market_value:,.2f}"
+    return "📉", "DECREASED", details, change.new_position.side.upper()
+
+
+# Position change type -> formatter, replaces an if/elif ladder per message
+_POSITION_CHANGE_FORMATTERS = {
+    "opened": _format_opened,
+    "closed": _format_closed,
+    "increased": _format_increased,
+    "decreased": _format_decreased,
+}
+
+
+class _DebouncedSaver:
+    """Background writer that runs a save coroutine at most once per flush delay"""
+    
+    def __init__(self, save: Callable[[], Awaitable[None]], delay: float):
+        self._save = save
+        self._delay = delay
+        self._dirty = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._saving: Optional[asyncio.Task] = None  # Save in progress
+    
+    @property
+    def pending(self) -> bool:
+        """True while there are changes that haven't reached the file yet"""
+        return self._dirty.is_set() or self._saving is not None
+    
+    def mark_dirty(self):
+        """Schedule a coalesced save on the running event loop"""
+        self._dirty.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+    
+    async def _run(self):
+        while True:
+            await self._dirty.wait()
+            # Let a burst of changes collapse into one write
+            await asyncio.sleep(self._delay)
+            self._dirty.clear()
+            # Shielded: cancelling mid-save would release the save lock while the
+            # worker thread is still writing, letting the final flush be
+            # overwritten by this older content
+            self._saving = asyncio.ensure_future(self._save())
+            await asyncio.shield(self._saving)
+            self._saving = None
+    
+    async def stop(self):
+        """Stop the writer and flush any pending changes"""
+        if self._task is not None:
+            in_flight = self._saving
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            
+            # Let a save that was already running finish before the final flush
+            if in_flight is not None:
+                await in_flight
+                self._saving = None
+        
+        if self._dirty.is_set():
+            self._dirty.clear()
+            await self._save()
+
 
 class TelegramNotifier:
     """Handles sending notifications via Telegram bot"""
@@ -43,30 +174,81 @@ class TelegramNotifier:
         self.config = Config
         self.logger = logging.getLogger('TelegramNotifier')
         self.bot: Optional[Bot] = None
+        self.request = None  # HTTPXRequest connection pool, shared with the command handler
         self.enabled = False
         self.application = None
         self.command_handler = None
         
+        # Broadcast send queue, started lazily on the running event loop
+        self._send_loop = None
+        self._send_queue: Optional[asyncio.PriorityQueue] = None
+        self._send_workers: List[asyncio.Task] = []
+        self._send_sequence = itertools.count()  # FIFO tie-break within a priority
+        self._send_slot_lock: Optional[asyncio.Lock] = None
+        self._next_send_at = 0.0  # Loop time of the next free send slot
+        
+        # Cached HH:MM:SS timestamp for message footers (see _now_hms)
+        self._last_now_ts = 0
+        self._last_now_str = ""
+        
+        # File writes run in a worker thread; locks keep them in call order
+        self._dynamic_addresses_save_lock = asyncio.Lock()
+        self._user_chat_ids_save_lock = asyncio.Lock()
+        
+        # Held around dynamic_addresses mutations and copies so synchronous
+        # readers (including ones running in worker threads) see a consistent dict
+        self._addr_lock_sync = threading.Lock()
+        
+        # Bumped on every add/remove; snapshot() rebuilds only when it changes
+        self._addresses_version = 0
+        self._snapshot_version = -1
+        self._snapshot: Optional[Tuple[tuple, Mapping[str, str]]] = None
+        
+        # Background writers that coalesce dynamic address and user list saves
+        self._address_saver = _DebouncedSaver(self._save_dynamic_addresses_async, DYNAMIC_ADDRESSES_FLUSH_DELAY)
+        self._user_saver = _DebouncedSaver(self._save_user_chat_ids_async, USER_CHAT_IDS_FLUSH_DELAY)
+        
+        # Queue of ("add"|"remove", address, label) events for a subscriber in
+        # the same process; None until someone subscribes. The tracker and the
+        # command handler usually run as separate processes, where changes
+        # travel through the file instead (see reload_dynamic_addresses_if_changed)
+        self.address_events: Optional[asyncio.Queue] = None
+        
         # File to store dynamically added addresses
         self.dynamic_addresses_file = f"{self.config.DATA_DIR}/dynamic_addresses.json"
         
         # File to store all user chat IDs for broadcasting
         self.user_chat_ids_file = f"{self.config.DATA_DIR}/user_chat_ids.json"
         
-        # Load dynamically added addresses
+        # Load dynamically added addresses, remembering the file version seen
+        self._dynamic_addresses_stamp = self._dynamic_addresses_file_stamp()
         self.dynamic_addresses = self._load_dynamic_addresses()
         
         # Load user chat IDs for broadcasting
         self.user_chat_ids = self._load_user_chat_ids()
+        self._chat_id_set = {user_info['chat_id'] for user_info in self.user_chat_ids.values()}
+        
+        # Parse the main chat ID once instead of on every broadcast
+        self._main_chat_id = self._parse_main_chat_id()
         
         # Add main chat ID as a user if configured and no users exist
-        if self.config.TELEGRAM_CHAT_ID and not self.user_chat_ids:
-            self.add_user(int(self.config.TELEGRAM_CHAT_ID), "MainChat", "Main User")
+        if self._main_chat_id is not None and not self.user_chat_ids:
+            self.add_user(self._main_chat_id, "MainChat", "Main User")
         
         # Initialize if Telegram is enabled and available
         if self.config.ENABLE_TELEGRAM_ALERTS and TELEGRAM_AVAILABLE:
             self._initialize_bot()
     
+    def _parse_main_chat_id(self) -> Optional[int]:
+        """Parse TELEGRAM_CHAT_ID into an int (None if unset or invalid)"""
+        if not self.config.TELEGRAM_CHAT_ID:
+            return None
+        try:
+            return int(self.config.TELEGRAM_CHAT_ID)
+        except ValueError:
+            self.logger.error(f"Invalid TELEGRAM_CHAT_ID: {self.config.TELEGRAM_CHAT_ID}")
+            return None
+    
     def _initialize_bot(self):
         """Initialize the Telegram bot with command handlers"""
         try:
@@ -79,16 +261,21 @@ class TelegramNotifier:
                 return
             
             # Create custom request object with better timeout settings
+            # Pool is sized at 2x broadcast concurrency so fan-out sends never
+            # wait on pool_timeout while other API calls are in flight
             if HTTPXRequest:
                 request = HTTPXRequest(
-                    connection_pool_size=8,
-                    connect_timeout=30.0,
-                    read_timeout=30.0,
-                    write_timeout=30.0,
-                    pool_timeout=5.0
+                    connection_pool_size=self.config.TELEGRAM_BROADCAST_CONCURRENCY * 2,
+                    connect_timeout=10.0,
+                    read_timeout=15.0,
+                    write_timeout=15.0,
+                    pool_timeout=30.0,
+                    # HTTP/2 multiplexes concurrent sends over a single connection
+                    http_version="2" if HTTP2_AVAILABLE else "1.1"
                 )
                 # Create bot with custom request settings for better reliability
                 self.bot = Bot(token=self.config.TELEGRAM_BOT_TOKEN, request=request)
+                self.request = request
             else:
                 # Fallback for older versions
                 self.bot = Bot(token=self.config.TELEGRAM_BOT_TOKEN)
@@ -140,78 +327,68 @@ class TelegramNotifier:
             self.logger.error("Telegram connection timed out - check network connectivity or firewall")
             self.logger.error("💡 Tip: Telegram may be blocked on your network")
             return False
+        except InvalidToken:
+            self.logger.error("Telegram bot unauthorized - check bot token")
+            return False
+        except Forbidden:
+            self.logger.error("Telegram bot forbidden - check chat ID or start chat with bot")
+            return False
         except (TimedOut, NetworkError) as e:
             self.logger.error(f"Telegram network error: {e}")
             self.logger.error("💡 This usually indicates network connectivity issues")
             return False
         except Exception as e:
-            error_msg = str(e).lower()
-            if 'timeout' in error_msg or 'timed out' in error_msg:
-                self.logger.error("Telegram connection timed out - check network connectivity")
-                self.logger.error("💡 Tip: Try running on a server where Telegram is not blocked")
-            elif 'unauthorized' in error_msg:
-                self.logger.error("Telegram bot unauthorized - check bot token")
-            elif 'forbidden' in error_msg:
-                self.logger.error("Telegram bot forbidden - check chat ID or start chat with bot")
-            else:
-                self.logger.error(f"Telegram connection test failed: {e}")
+            self.logger.error(f"Telegram connection test failed: {e}")
             return False
     
-    async def send_message(self, message: str, parse_mode: str = None) -> bool:
+    async def send_message(self, message: str, parse_mode: str = None, priority: int = PRIORITY_LOW) -> bool:
         """Send a message to all users (broadcast)"""
         if not self.enabled or not self.bot:
             self.logger.debug("Telegram bot not enabled or not initialized")
             return False
         
-        # Get all user chat IDs for broadcasting
-        all_chat_ids = self.get_all_user_chat_ids()
-        self.logger.debug(f"🔍 Retrieved {len(all_chat_ids)} user chat IDs for broadcast: {all_chat_ids}")
+        # Reject over-long messages once instead of failing the send for every user
+        if len(message) > TELEGRAM_MAX_MESSAGE_LENGTH:
+            self.logger.warning(
+                f"Message too long for Telegram ({len(message)} > {TELEGRAM_MAX_MESSAGE_LENGTH} chars) - not broadcasting"
+            )
+            return False
+        
+        # Snapshot the user chat IDs for broadcasting; the live set shrinks
+        # while sending as blocked users are pruned
+        all_chat_ids = tuple(self.get_all_user_chat_ids())
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"🔍 Retrieved {len(all_chat_ids)} user chat IDs for broadcast: {all_chat_ids}")
         
         # If no users registered, fall back to main chat ID (if configured)
-        if not all_chat_ids and self.config.TELEGRAM_CHAT_ID:
-            all_chat_ids = [int(self.config.TELEGRAM_CHAT_ID)]
-            self.logger.debug(f"No users registered, falling back to main chat ID: {all_chat_ids}")
+        if not all_chat_ids and self._main_chat_id is not None:
+            all_chat_ids = (self._main_chat_id,)
+            self.logger.debug(f"No users registered, falling back to main chat ID: {self._main_chat_id}")
         
         if not all_chat_ids:
             self.logger.warning("No users to send message to. Users need to interact with the bot first.")
             return False
         
-        success_count = 0
+        # Build the send arguments once for the whole broadcast
+        # Messages are sent as plain text instead of HTML formatting
+        send_kwargs = {
+            "text": message,
+            "parse_mode": None,
+            "disable_web_page_preview": True
+        }
         
-        for i, chat_id in enumerate(all_chat_ids):
-            try:
-                self.logger.debug(f"📤 Sending message to user {i+1}/{len(all_chat_ids)}: {chat_id}")
-                
-                # Use plain text instead of HTML formatting
-                parse_mode = None
-                
-                # Add timeout to message sending
-                await asyncio.wait_for(
-                    self.bot.send_message(
-                        chat_id=chat_id,
-                        text=message,
-                        parse_mode=parse_mode,
-                        disable_web_page_preview=True
-                    ),
-                    timeout=15.0  # 15 second timeout
-                )
-                success_count += 1
-                self.logger.debug(f"✅ Message sent successfully to {chat_id}")
-                
-                # Small delay between messages to avoid rate limiting
-                await asyncio.sleep(0.1)
-                
-            except asyncio.TimeoutError:
-                self.logger.error(f"❌ Failed to send message to {chat_id}: Connection timed out")
-            except (TimedOut, NetworkError) as e:
-                self.logger.error(f"❌ Failed to send message to {chat_id}: Network error - {e}")
-            except Exception as e:
-                self.logger.error(f"❌ Failed to send message to {chat_id}: {e}")
-                
-                # If chat not found, remove the invalid user
-                if "Chat not found" in str(e):
-                    self.logger.warning(f"Removing invalid user {chat_id} from broadcast list")
-                    self._remove_invalid_user(chat_id)
+        # Queue one send per user; workers drain high priority items first so
+        # position alerts never wait behind a long low priority broadcast
+        self._ensure_send_workers()
+        loop = asyncio.get_running_loop()
+        futures = []
+        for chat_id in all_chat_ids:
+            future = loop.create_future()
+            self._send_queue.put_nowait((priority, next(self._send_sequence), chat_id, send_kwargs, future))
+            futures.append(future)
+        
+        results = await asyncio.gather(*futures)
+        success_count = sum(results)
         
         if success_count > 0:
             self.logger.info(f"📊 Successfully sent message to {success_count}/{len(all_chat_ids)} users")
@@ -220,39 +397,118 @@ class TelegramNotifier:
             self.logger.error("❌ Failed to send message to any users")
             return False
     
+    def _ensure_send_workers(self):
+        """Start the send queue and its workers on the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._send_loop is loop:
+            return
+        
+        # Queues are bound to the loop they are first used on, so start fresh
+        self._send_loop = loop
+        self._send_queue = asyncio.PriorityQueue()
+        self._send_slot_lock = asyncio.Lock()
+        self._send_workers = [
+            loop.create_task(self._send_worker())
+            for _ in range(self.config.TELEGRAM_BROADCAST_CONCURRENCY)
+        ]
+    
+    async def _send_worker(self):
+        """Deliver queued messages, lowest priority value first"""
+        while True:
+            _, _, chat_id, send_kwargs, future = await self._next_send()
+            try:
+                sent = await self._deliver_to_chat(chat_id, send_kwargs)
+            except Exception as e:
+                self.logger.error(f"❌ Failed to send message to {chat_id}: {e}")
+                sent = False
+            finally:
+                self._send_queue.task_done()
+            
+            # The broadcast may have been cancelled (e.g. by a timeout) meanwhile
+            if not future.done():
+                future.set_result(sent)
+    
+    async def _next_send(self) -> tuple:
+        """Wait for the next send slot, then dequeue the most urgent message
+        
+        Workers take turns under the slot lock and only dequeue once the slot
+        is due, so an alert queued while they wait still beats earlier
+        broadcasts; the spacing keeps all workers under Telegram's global rate limit.
+        """
+        loop = asyncio.get_running_loop()
+        async with self._send_slot_lock:
+            delay = self._next_send_at - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            
+            item = await self._send_queue.get()
+            self._next_send_at = loop.time() + 1.0 / self.config.TELEGRAM_MAX_MESSAGES_PER_SECOND
+            return item
+    
+    async def _deliver_to_chat(self, chat_id: int, send_kwargs: Dict[str, Any]) -> bool:
+        """Send a message to a single user, handling per-chat errors"""
+        try:
+            self.logger.debug(f"📤 Sending message to user {chat_id}")
+            
+            try:
+                await self._send_to_chat(chat_id, send_kwargs)
+            except RetryAfter as e:
+                # Flood control: wait as instructed by Telegram, then retry once
+                retry_after = e.retry_after
+                if isinstance(retry_after, timedelta):
+                    retry_after = retry_after.total_seconds()
+                self.logger.warning(f"⏳ Rate limited sending to {chat_id}, retrying in {retry_after}s")
+                await asyncio.sleep(retry_after)
+                await self._send_to_chat(chat_id, send_kwargs)
+            
+            self.logger.debug(f"✅ Message sent successfully to {chat_id}")
+            return True
+            
+        except asyncio.TimeoutError:
+            self.logger.error(f"❌ Failed to send message to {chat_id}: Connection timed out")
+        except Forbidden:
+            # User blocked the bot or left the chat
+            self.logger.warning(f"Removing blocked user {chat_id} from broadcast list")
+            self._remove_invalid_user(chat_id)
+        except BadRequest as e:
+            self.logger.error(f"❌ Failed to send message to {chat_id}: {e.message}")
+            
+            # If chat not found, remove the invalid user
+            if "chat not found" in e.message.lower():
+                self.logger.warning(f"Removing invalid user {chat_id} from broadcast list")
+                self._remove_invalid_user(chat_id)
+        except (TimedOut, NetworkError) as e:
+            self.logger.error(f"❌ Failed to send message to {chat_id}: Network error - {e}")
+        except Exception as e:
+            self.logger.error(f"❌ Failed to send message to {chat_id}: {e}")
+        return False
+    
+    async def _send_to_chat(self, chat_id: int, send_kwargs: Dict[str, Any]):
+        """Send a message to a single chat (raises on failure)"""
+        await asyncio.wait_for(
+            self.bot.send_message(chat_id=chat_id, **send_kwargs),
+            timeout=15.0  # 15 second timeout
+        )
+    
+    def _now_hms(self) -> str:
+        """Current time as HH:MM:SS, formatted at most once per second"""
+        now_ts = int(time.time())
+        if now_ts != self._last_now_ts:
+            self._last_now_str = datetime.now().strftime('%H:%M:%S')
+            self._last_now_ts = now_ts
+        return self._last_now_str
+    
     def _format_position_change_message(self, change: Any) -> str:
         """Format a position change for Telegram with Hyperdash link"""
-        # Get address label (including dynamic addresses)
-        labels = self.get_all_address_labels()
-        address_label = labels.get(change.address, f"{change.address[:6]}...{change.address[-4:]}")
+        # Get address label (including dynamic addresses) without copying the dict
+        address_label = self.dynamic_addresses.get(change.address)
+        if address_label is None:
+            address_label = short_address_label(change.address)
         
         # Format based on change type
-        if change.change_type == "opened":
-            emoji = "🟢"
-            action = "OPENED"
-            details = f"${change.change_amount:,.2f} @ ${change.new_position.entry_price}"
-            side = change.new_position.side.upper()
-        
-        elif change.change_type == "closed":
-            emoji = "🔴"
-            action = "CLOSED"
-            details = f"${change.change_amount:,.2f}"
-            side = change.old_position.side.upper()
-            pnl = change.old_position.unrealized_pnl
-            details += f"\nPnL: ${pnl:+,.2f}"
-        
-        elif change.change_type == "increased":
-            emoji = "📈"
-            action = "INCREASED"
-            details = f"+${change.change_amount:,.2f}\nTotal: ${change.new_position.market_value:,.2f}"
-            side = change.new_position.side.upper()
-        
-        elif change.change_type == "decreased":
-            emoji = "📉"
-            action = "DECREASED"
-            details = f"-${change.change_amount:,.2f}\nTotal: ${change.new_position.market_value:,.2f}"
-            side = change.new_position.side.upper()
-        
+        formatter = _POSITION_CHANGE_FORMATTERS.get(change.change_type)
+        if formatter:
+            emoji, action, details, side = formatter(change)
         else:
             emoji = "ℹ️"
             action = change.change_type.upper()
@@ -282,7 +538,7 @@ class TelegramNotifier:
         self.logger.info(f"📨 Sending position change notification: {change.change_type} {change.symbol}")
         
         message = self._format_position_change_message(change)
-        result = await self.send_message(message)
+        result = await self.send_message(message, priority=PRIORITY_HIGH)
         
         if result:
             self.logger.info(f"✅ Position change notification sent successfully: {change.symbol}")
@@ -335,7 +591,7 @@ class TelegramNotifier:
         """Send an error alert"""
         message = f"⚠️ Whale Tracker Error\n\n"
         message += f"❌ {error_message}\n"
-        message += f"🕐 {datetime.now().strftime('%H:%M:%S')}\n\n"
+        message += f"🕐 {self._now_hms()}\n\n"
         message += "Please check the logs for more details."
         
         return await self.send_message(message)
@@ -366,7 +622,7 @@ class TelegramNotifier:
         message += f"📊 {address[:10]}...{address[-8:]}\n"
         message += f"🔗 View on Hyperdash: https://hyperdash.info/trader/{address}\n\n"
         message += f"⚡ Now monitoring for position changes\n"
-        message += f"🕐 {datetime.now().strftime('%H:%M:%S')}"
+        message += f"🕐 {self._now_hms()}"
         
         return await self.send_message(message)
     
@@ -376,7 +632,7 @@ class TelegramNotifier:
         message += f"📍 {label}\n"
         message += f"📊 {address[:10]}...{address[-8:]}\n\n"
         message += f"🛑 No longer monitoring this address\n"
-        message += f"🕐 {datetime.now().strftime('%H:%M:%S')}"
+        message += f"🕐 {self._now_hms()}"
         
         return await self.send_message(message)
     
@@ -390,12 +646,76 @@ class TelegramNotifier:
             self.logger.error(f"Error loading dynamic addresses: {e}")
         return {}
     
-    def _save_dynamic_addresses(self):
-        """Save dynamically added addresses to file"""
+    def _dynamic_addresses_file_stamp(self) -> Optional[tuple]:
+        """(mtime, size) of the dynamic addresses file, or None if it doesn't exist"""
+        # The size catches rewrites within the filesystem's timestamp granularity
+        try:
+            st = os.stat(self.dynamic_addresses_file)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+    
+    def reload_dynamic_addresses_if_changed(self) -> bool:
+        """Re-read dynamic addresses if the file changed since it was last read
+        
+        /add and /remove from a command handler running in another process only
+        reach this one through the file. Returns True if the addresses were reloaded.
+        """
+        # Our own unsaved or in-flight changes are newer than the file
+        if self._address_saver.pending:
+            return False
+        
+        stamp = self._dynamic_addresses_file_stamp()
+        if stamp is None or stamp == self._dynamic_addresses_stamp:
+            return False
+        
+        try:
+            with open(self.dynamic_addresses_file, 'r') as f:
+                addresses = json.load(f)
+        except Exception as e:
+            # Keep the current addresses and try again next time
+            self.logger.error(f"Error reloading dynamic addresses: {e}")
+            return False
+        
+        with self._addr_lock_sync:
+            self.dynamic_addresses = addresses
+            self._addresses_version += 1
+        self._dynamic_addresses_stamp = stamp
+        return True
+    
+    def _write_json_file(self, path: str, content: str):
+        """Write serialized JSON to a file (blocking)
+        
+        Writes to a temporary file and renames it into place, so overlapping
+        writes or a crash mid-write never leave a truncated file behind.
+        """
+        os.makedirs(self.config.DATA_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.config.DATA_DIR, suffix='.tmp')
+        try:
+            # mkstemp creates the file as 0600 and the rename would carry that
+            # over; keep the existing file's mode so other readers keep access
+            try:
+                mode = os.stat(path).st_mode & 0o777
+            except FileNotFoundError:
+                mode = 0o644
+            os.chmod(tmp_path, mode)
+            
+            with os.fdopen(fd, 'w') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    
+    async def _save_dynamic_addresses_async(self):
+        """Save dynamically added addresses to file without blocking the event loop"""
         try:
-            os.makedirs(self.config.DATA_DIR, exist_ok=True)
-            with open(self.dynamic_addresses_file, 'w') as f:
-                json.dump(self.dynamic_addresses, f, indent=2)
+            # Serialize on the loop so the dict can't change mid-dump; the lock
+            # keeps writes in call order
+            async with self._dynamic_addresses_save_lock:
+                with self._addr_lock_sync:
+                    content = json.dumps(self.dynamic_addresses, indent=2)
+                await asyncio.to_thread(self._write_json_file, self.dynamic_addresses_file, content)
         except Exception as e:
             self.logger.error(f"Error saving dynamic addresses: {e}")
     
@@ -414,12 +734,34 @@ class TelegramNotifier:
     def _save_user_chat_ids(self):
         """Save all user chat IDs to file"""
         try:
-            os.makedirs(self.config.DATA_DIR, exist_ok=True)
-            with open(self.user_chat_ids_file, 'w') as f:
-                json.dump(self.user_chat_ids, f, indent=2)
+            self._write_json_file(self.user_chat_ids_file, json.dumps(self.user_chat_ids, indent=2))
+        except Exception as e:
+            self.logger.error(f"Error saving user chat IDs: {e}")
+    
+    async def _save_user_chat_ids_async(self):
+        """Save all user chat IDs to file without blocking the event loop"""
+        try:
+            async with self._user_chat_ids_save_lock:
+                content = json.dumps(self.user_chat_ids, indent=2)
+                await asyncio.to_thread(self._write_json_file, self.user_chat_ids_file, content)
         except Exception as e:
             self.logger.error(f"Error saving user chat IDs: {e}")
     
+    def _schedule_save_user_chat_ids(self):
+        """Schedule a coalesced save of user chat IDs if an event loop is running"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # Called outside of asyncio (e.g. during __init__) - save directly
+            self._save_user_chat_ids()
+            return
+        
+        self._user_saver.mark_dirty()
+    
+    async def stop_user_persistence(self):
+        """Stop the background user list writer and flush any pending changes"""
+        await self._user_saver.stop()
+    
     def _remove_invalid_user(self, chat_id: int):
         """Remove an invalid user from the broadcast list"""
         try:
@@ -428,29 +770,16 @@ class TelegramNotifier:
                 user_info = self.user_chat_ids[user_key]
                 username = user_info.get('username', 'Unknown')
                 del self.user_chat_ids[user_key]
-                self._save_user_chat_ids()
+                self._chat_id_set.discard(chat_id)
+                self._schedule_save_user_chat_ids()
                 self.logger.info(f"Removed invalid user from broadcast list: @{username} (ID: {chat_id})")
         except Exception as e:
             self.logger.error(f"Error removing invalid user {chat_id}: {e}")
     
     def _validate_address(self, address: str) -> bool:
         """Validate if an address looks like a valid Ethereum address"""
-        if not address:
-            return False
-        
-        # Basic Ethereum address validation
-        if not address.startswith('0x'):
-            return False
-        
-        if len(address) != 42:
-            return False
-        
-        # Check if it's hexadecimal
-        try:
-            int(address[2:], 16)
-            return True
-        except ValueError:
-            return False
+        # 0x prefix followed by exactly 40 hex characters
+        return bool(address) and _ADDR_RE.match(address) is not None
     
     def _generate_unique_alias(self) -> str:
         """Generate a unique random alias for an address"""
@@ -513,22 +842,29 @@ class TelegramNotifier:
         
         if user_key not in self.user_chat_ids:
             self.user_chat_ids[user_key] = user_info
-            self._save_user_chat_ids()
+            self._chat_id_set.add(user_id)
+            self._schedule_save_user_chat_ids()
             self.logger.info(f"Added new user to broadcast list: @{username} (ID: {user_id})")
         else:
-            # Update existing user info
-            self.user_chat_ids[user_key].update({
-                'username': username or self.user_chat_ids[user_key].get('username', 'Unknown'),
-                'first_name': first_name or self.user_chat_ids[user_key].get('first_name', 'Unknown')
-            })
-            self._save_user_chat_ids()
+            # Update existing user info; most commands come from known users
+            # whose details haven't changed, so only save when something did
+            existing = self.user_chat_ids[user_key]
+            new_username = username or existing.get('username', 'Unknown')
+            new_first_name = first_name or existing.get('first_name', 'Unknown')
+            if existing.get('username') != new_username or existing.get('first_name') != new_first_name:
+                existing['username'] = new_username
+                existing['first_name'] = new_first_name
+                self._schedule_save_user_chat_ids()
     
-    def get_all_user_chat_ids(self) -> List[int]:
-        """Get all user chat IDs for broadcasting"""
-        chat_ids = [user_info['chat_id'] for user_info in self.user_chat_ids.values()]
-        self.logger.debug(f"🔍 get_all_user_chat_ids: Found {len(chat_ids)} users: {chat_ids}")
-        self.logger.debug(f"🔍 Raw user_chat_ids data: {self.user_chat_ids}")
-        return chat_ids
+    def get_all_user_chat_ids(self) -> Set[int]:
+        """Get all user chat IDs for broadcasting
+        
+        Returns the live set (no copy) - do not hold it across an await.
+        """
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"🔍 get_all_user_chat_ids: Found {len(self._chat_id_set)} users: {self._chat_id_set}")
+            self.logger.debug(f"🔍 Raw user_chat_ids data: {self.user_chat_ids}")
+        return self._chat_id_set
     
     async def handle_add_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /add command to add new addresses"""
@@ -565,17 +901,13 @@ class TelegramNotifier:
                 )
                 return
             
-            # Check if already tracking (only check dynamic addresses)
-            if address in self.dynamic_addresses:
+            # Add to dynamic addresses (fails if already tracked)
+            if not await self.add_dynamic_address(address, label):
                 await update.message.reply_text(
                     f"⚠️ Address {address[:10]}... is already being tracked"
                 )
                 return
             
-            # Add to dynamic addresses
-            self.dynamic_addresses[address] = label
-            self._save_dynamic_addresses()
-            
             # Note: No longer adding to config.TRACKED_ADDRESSES - use only dynamic addresses
             
             # Send confirmation reply
@@ -607,28 +939,29 @@ class TelegramNotifier:
             user = update.message.from_user
             self.add_user(user.id, user.username, user.first_name)
             
-            message = "📊 Tracked Addresses:\n\n"
+            # Get all tracked addresses with labels (only dynamic from Telegram)
+            addresses, labels = self.snapshot()
             
-            # Get all tracked addresses (only dynamic from Telegram)
-            all_tracked_addresses = self.get_all_tracked_addresses()
-            
-            for i, address in enumerate(all_tracked_addresses, 1):
-                label = self.dynamic_addresses.get(address, f"{address[:6]}...{address[-4:]}")
-                
-                message += f"📌 {label}\n"
-                message += f"   📍 {address[:10]}...{address[-8:]}\n"
-                message += f"   🔗 https://hyperdash.info/trader/{address}\n\n"
-            
-            message += f"📈 Total: {len(all_tracked_addresses)} addresses\n"
-            message += f"📌 Dynamic: {len(self.dynamic_addresses)} addresses\n"
-            message += f"⚙️ Static: 0 addresses"
+            # Build the reply in one join instead of repeated concatenation
+            message = "".join((
+                "📊 Tracked Addresses:\n\n",
+                *(
+                    f"📌 {label}\n"
+                    f"   📍 {address[:10]}...{address[-8:]}\n"
+                    f"   🔗 https://hyperdash.info/trader/{address}\n\n"
+                    for address, label in labels.items()
+                ),
+                f"📈 Total: {len(addresses)} addresses\n",
+                f"📌 Dynamic: {len(addresses)} addresses\n",
+                "⚙️ Static: 0 addresses"
+            ))
             
             await update.message.reply_text(message)
             
             # Log the action with user info
             username = update.message.from_user.username or "Unknown"
             user_id = update.message.from_user.id
-            self.logger.info(f"List command used by @{username} (ID: {user_id}) - {len(all_tracked_addresses)} addresses shown")
+            self.logger.info(f"List command used by @{username} (ID: {user_id}) - {len(addresses)} addresses shown")
             
         except Exception as e:
             self.logger.error(f"Error handling list command: {e}")
@@ -659,21 +992,16 @@ class TelegramNotifier:
                 )
                 return
             
-            # Check if address is being tracked (only check dynamic addresses)
-            if address not in self.dynamic_addresses:
+            # Remove from dynamic addresses
+            label = await self.remove_dynamic_address(address)
+            
+            # Check if address was being tracked (only check dynamic addresses)
+            if label is None:
                 await update.message.reply_text(
                     f"⚠️ Address {address[:10]}... is not being tracked"
                 )
                 return
             
-            # Get label before removal
-            all_labels = self.get_all_address_labels()
-            label = all_labels.get(address, f"{address[:6]}...{address[-4:]}")
-            
-            # Remove from dynamic addresses
-            del self.dynamic_addresses[address]
-            self._save_dynamic_addresses()
-            
             # Send confirmation
             await update.message.reply_text(
                 f"✅ Address Removed Successfully!\n\n"
@@ -694,14 +1022,69 @@ class TelegramNotifier:
             self.logger.error(f"Error handling remove command: {e}")
             await update.message.reply_text("❌ Error processing command")
     
+    async def add_dynamic_address(self, address: str, label: str) -> bool:
+        """Start tracking an address; returns False if it is already tracked"""
+        # Nothing here awaits, so concurrent /add and /remove commands can't
+        # interleave between the check, the mutation and the save
+        with self._addr_lock_sync:
+            if address in self.dynamic_addresses:
+                return False
+            self.dynamic_addresses[address] = label
+            self._addresses_version += 1
+        self._mark_dynamic_addresses_dirty()
+        self._publish_address_event("add", address, label)
+        return True
+    
+    async def remove_dynamic_address(self, address: str) -> Optional[str]:
+        """Stop tracking an address; returns its label, or None if not tracked"""
+        with self._addr_lock_sync:
+            label = self.dynamic_addresses.pop(address, None)
+            if label is not None:
+                self._addresses_version += 1
+        if label is not None:
+            self._mark_dynamic_addresses_dirty()
+            self._publish_address_event("remove", address, label)
+        return label
+    
+    def _mark_dynamic_addresses_dirty(self):
+        """Schedule a coalesced save of dynamic addresses"""
+        self._address_saver.mark_dirty()
+    
+    async def stop_address_persistence(self):
+        """Stop the background writer and flush any pending changes"""
+        await self._address_saver.stop()
+    
+    def subscribe_address_events(self) -> asyncio.Queue:
+        """Get the queue that receives address add/remove events"""
+        if self.address_events is None:
+            self.address_events = asyncio.Queue()
+        return self.address_events
+    
+    def _publish_address_event(self, action: str, address: str, label: str):
+        """Push an address change to the subscriber, if there is one"""
+        if self.address_events is not None:
+            self.address_events.put_nowait((action, address, label))
+    
     def get_all_tracked_addresses(self) -> List[str]:
         """Get all tracked addresses (only dynamic from Telegram)"""
         # Only return dynamic addresses added via Telegram - ignore config file addresses
-        return list(self.dynamic_addresses.keys())
+        with self._addr_lock_sync:
+            return list(self.dynamic_addresses)
+    
+    def snapshot(self) -> Tuple[tuple, Mapping[str, str]]:
+        """Get (addresses, labels) for all tracked addresses as one consistent view"""
+        # Shared between callers until the next add/remove, so labels is read-only
+        with self._addr_lock_sync:
+            if self._snapshot_version != self._addresses_version:
+                labels = self.dynamic_addresses.copy()
+                self._snapshot = (tuple(labels), MappingProxyType(labels))
+                self._snapshot_version = self._addresses_version
+            return self._snapshot
     
     def get_all_address_labels(self) -> Dict[str, str]:
         """Get all address labels (only dynamic from Telegram)"""
-        return self.dynamic_addresses.copy()
+        with self._addr_lock_sync:
+            return self.dynamic_addresses.copy()
 
 
 # Global notifier instance
@@ -5,12 +5,112 @@ Run this alongside the main tracker to handle /add and /list commands
 """
 
 import asyncio
+import functools
+import json
 import logging
+import secrets
+import signal
+import time
+from datetime import datetime
+import aiohttp
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes, CallbackQueryHandler
-from telegram_bot import TelegramNotifier
+from telegram_bot import get_telegram_notifier, short_address_label
 from config import Config
 
+try:
+    import uvloop  # Faster event loop (not available on Windows)
+except ImportError:
+    uvloop = None
+
+try:
+    import orjson  # Faster JSON encoding/decoding for Hyperliquid API calls
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    _json_loads = orjson.loads
+    
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+else:
+    _json_loads = json.loads
+    _json_dumps = json.dumps
+
+# Static /help response, built once at import
+_HELP_TEXT = (
+    "🐋 Whale Tracker Commands\n\n"
+    "🌍 All Commands (available to everyone):\n\n"
+    "📌 /add address:label\n"
+    "   Add new address with custom label\n"
+    "   Example: /add 0x1234...5678:My Whale\n\n"
+    "📌 /add address\n"
+    "   Add new address with random unique alias\n"
+    "   Example: /add 0x1234...5678 (generates alias like 'Swift Whale')\n\n"
+    "🗑️ /remove address\n"
+    "   Remove address from tracking\n"
+    "   Example: /remove 0x1234...5678\n\n"
+    "📊 /list\n"
+    "   Show all tracked addresses with interactive buttons\n"
+    "   Use 🔍 Check to see positions or 🗑️ Remove to stop tracking\n\n"
+    "🔍 /check address\n"
+    "   Check current positions for any address\n"
+    "   Example: /check 0x1234...5678\n\n"
+    "❓ /help\n"
+    "   Show this help message\n\n"
+    "📝 Notes:\n"
+    "• Addresses must be 42 characters long\n"
+    "• Addresses must start with 0x\n"
+    "• Only actual position changes are alerted\n"
+    "• Opening positions are skipped to avoid spam\n"
+    "• Changes take effect in next polling cycle (10s)"
+)
+
+# /start response; only the user's name is filled in per request
+_START_TEMPLATE = (
+    "🐋 Welcome to Whale Tracker, {username}!\n\n"
+    "This bot helps you monitor Hyperliquid trading positions.\n\n"
+    "🌍 Available Commands:\n"
+    "📌 /add address:label - Add addresses to track\n"
+    "🔍 /check address - Check positions for any address\n"
+    "📊 /list - Show tracked addresses with interactive buttons\n"
+    "❓ /help - Show all commands\n\n"
+    "💡 Try: /check 0x[address] to see someone's positions!\n"
+    "💡 Or: /add 0x[address]:Label or /add 0x[address] (auto-alias)!\n\n"
+    "📊 Built for tracking whale movements on Hyperliquid DEX\n\n"
+    "🔔 You'll now receive whale movement alerts!"
+)
+
+# One position block in a /check reply
+_POS_FMT = (
+    "{emoji} {sym} {side}\n"
+    "📦 Size: {size:.4f}\n"
+    "💵 Entry: ${entry:,.2f}\n"
+    "💰 Value: ${val:,.2f}\n"
+    "📊 PnL: ${pnl:+,.2f}\n"
+).format
+
+
+# /list button callback_data is a one-character action code followed by the
+# address without "0x" - 41 bytes, within Telegram's 64-byte limit - so a
+# button keeps working across restarts without any server-side state
+_BUTTON_ACTIONS = {"c": "check", "r": "remove"}
+
+
+def _button_data(code: str, address: str) -> str:
+    """callback_data for a /list button, e.g. "c" + 40 hex characters"""
+    return code + address[2:]
+
+
+@functools.lru_cache(maxsize=2048)
+def _display_address(address: str) -> str:
+    """Longer shortened form shown alongside labels, e.g. 0x12345678...9abcdef0"""
+    return f"{address[:10]}...{address[-8:]}"
+
+
+# Only the update types with registered handlers; callback queries drive the /list buttons
+_ALLOWED_UPDATES = [Update.MESSAGE, Update.CALLBACK_QUERY]
+
 
 class WhaleTrackerCommandHandler:
     """Handles Telegram commands for the whale tracker"""
@@ -18,14 +118,23 @@ class WhaleTrackerCommandHandler:
     def __init__(self):
         self.config = Config
         self.logger = logging.getLogger('CommandHandler')
-        self.notifier = TelegramNotifier()
+        self.notifier = get_telegram_notifier()
         self.application = None
         
-        # Set up logging
-        logging.basicConfig(
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            level=logging.INFO
-        )
+        # Set on SIGINT/SIGTERM to stop the command handler
+        self._stop_event = asyncio.Event()
+        
+        # Recent user_state responses (address -> (expires_at, user_state)) and
+        # in-flight requests, so repeated /check presses share one API call
+        self._user_state_cache = {}
+        self._user_state_inflight = {}
+        
+        # Shared HTTP session for Hyperliquid API calls, opened in start_command_handler
+        self._http = None
+        
+        # Slow work (position lookups, broadcasts) runs in detached tasks so the
+        # handler returns right away; each reply edits its own loading message
+        self._background_tasks = set()
     
     async def add_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /add command - available to everyone"""
@@ -37,8 +146,8 @@ class WhaleTrackerCommandHandler:
         user = update.message.from_user
         self.notifier.add_user(user.id, user.username, user.first_name)
         
-        # Get all tracked addresses
-        all_tracked_addresses = self.notifier.get_all_tracked_addresses()
+        # Get all tracked addresses and their labels in one consistent view
+        all_tracked_addresses, labels = self.notifier.snapshot()
         
         if not all_tracked_addresses:
             await update.message.reply_text(
@@ -52,31 +161,35 @@ class WhaleTrackerCommandHandler:
             return
         
         # Build message and inline keyboard
-        message = "📊 Tracked Addresses\n\n"
+        parts = ["📊 Tracked Addresses\n\n"]
         
         keyboards = []
         for i, address in enumerate(all_tracked_addresses, 1):
             # Get label for this address
-            labels = self.notifier.get_all_address_labels()
-            label = labels.get(address, f"{address[:6]}...{address[-4:]}")
+            label = labels.get(address, short_address_label(address))
             
             # Add address info to message
-            message += f"📌 {label}\n"
-            message += f"   📍 {address[:10]}...{address[-8:]}\n"
-            message += f"   🔗 https://hyperdash.info/trader/{address}\n\n"
+            parts.append(
+                f"📌 {label}\n"
+                f"   📍 {_display_address(address)}\n"
+                f"   🔗 https://hyperdash.info/trader/{address}\n\n"
+            )
             
             # Create inline keyboard buttons for this address with alias names
             button_row = [
-                InlineKeyboardButton(f"🔍 Check {label}", callback_data=f"check_{address}"),
-                InlineKeyboardButton(f"🗑️ Remove {label}", callback_data=f"remove_{address}")
+                InlineKeyboardButton(f"🔍 Check {label}", callback_data=_button_data("c", address)),
+                InlineKeyboardButton(f"🗑️ Remove {label}", callback_data=_button_data("r", address))
             ]
             keyboards.append(button_row)
         
         # Add summary
-        message += f"📈 Total: {len(all_tracked_addresses)} addresses\n"
-        message += f"📌 Dynamic: {len(self.notifier.dynamic_addresses)} addresses\n"
-        message += f"⚙️ Static: 0 addresses\n\n"
-        message += "💡 Use buttons below to check positions or remove addresses"
+        parts.append(
+            f"📈 Total: {len(all_tracked_addresses)} addresses\n"
+            f"📌 Dynamic: {len(labels)} addresses\n"
+            f"⚙️ Static: 0 addresses\n\n"
+            "💡 Use buttons below to check positions or remove addresses"
+        )
+        message = "".join(parts)
         
         # Create inline keyboard markup
         reply_markup = InlineKeyboardMarkup(keyboards)
@@ -99,35 +212,7 @@ class WhaleTrackerCommandHandler:
         user = update.message.from_user
         self.notifier.add_user(user.id, user.username, user.first_name)
         
-        help_text = (
-            "🐋 Whale Tracker Commands\n\n"
-            "🌍 All Commands (available to everyone):\n\n"
-            "📌 /add address:label\n"
-            "   Add new address with custom label\n"
-            "   Example: /add 0x1234...5678:My Whale\n\n"
-            "📌 /add address\n"
-            "   Add new address with random unique alias\n"
-            "   Example: /add 0x1234...5678 (generates alias like 'Swift Whale')\n\n"
-            "🗑️ /remove address\n"
-            "   Remove address from tracking\n"
-            "   Example: /remove 0x1234...5678\n\n"
-            "📊 /list\n"
-            "   Show all tracked addresses with interactive buttons\n"
-            "   Use 🔍 Check to see positions or 🗑️ Remove to stop tracking\n\n"
-            "🔍 /check address\n"
-            "   Check current positions for any address\n"
-            "   Example: /check 0x1234...5678\n\n"
-            "❓ /help\n"
-            "   Show this help message\n\n"
-            "📝 Notes:\n"
-            "• Addresses must be 42 characters long\n"
-            "• Addresses must start with 0x\n"
-            "• Only actual position changes are alerted\n"
-            "• Opening positions are skipped to avoid spam\n"
-            "• Changes take effect in next polling cycle (10s)"
-        )
-        
-        await update.message.reply_text(help_text)
+        await update.message.reply_text(_HELP_TEXT)
     
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /start command - available to everyone"""
@@ -137,26 +222,12 @@ class WhaleTrackerCommandHandler:
         
         username = update.message.from_user.first_name or "User"
         
-        welcome_text = (
-            f"🐋 Welcome to Whale Tracker, {username}!\n\n"
-            "This bot helps you monitor Hyperliquid trading positions.\n\n"
-            "🌍 Available Commands:\n"
-            "📌 /add address:label - Add addresses to track\n"
-            "🔍 /check address - Check positions for any address\n"
-            "📊 /list - Show tracked addresses with interactive buttons\n"
-            "❓ /help - Show all commands\n\n"
-            "💡 Try: /check 0x[address] to see someone's positions!\n"
-            "💡 Or: /add 0x[address]:Label or /add 0x[address] (auto-alias)!\n\n"
-            "📊 Built for tracking whale movements on Hyperliquid DEX\n\n"
-            "🔔 You'll now receive whale movement alerts!"
-        )
-        
         # Log the new user
         user_id = update.message.from_user.id
         username_log = update.message.from_user.username or "no_username"
         self.logger.info(f"New user started bot: @{username_log} (ID: {user_id})")
         
-        await update.message.reply_text(welcome_text)
+        await update.message.reply_text(_START_TEMPLATE.format(username=username))
     
     async def check_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /check command - available to everyone"""
@@ -179,7 +250,7 @@ class WhaleTrackerCommandHandler:
         address = context.args[0].strip()
         
         # Validate address format
-        if not self._validate_address(address):
+        if not self.notifier._validate_address(address):
             await update.message.reply_text(
                 "❌ Invalid Address Format\n\n"
                 "📝 Address must be:\n"
@@ -194,6 +265,11 @@ class WhaleTrackerCommandHandler:
         # Show loading message
         loading_message = await update.message.reply_text("🔍 Checking positions for address...")
         
+        # Fetch and reply in the background
+        self._spawn(self._finish_check_command(loading_message, address, user))
+    
+    async def _finish_check_command(self, loading_message, address: str, user):
+        """Fetch positions and replace the /check loading message with the result"""
         try:
             # Get positions for the address
             positions = await self._get_address_positions(address)
@@ -203,16 +279,15 @@ class WhaleTrackerCommandHandler:
             await loading_message.edit_text(response)
             
             # Log the check action with user info
-            username = update.message.from_user.username or "Unknown"
-            user_id = update.message.from_user.id
-            self.logger.info(f"Public /check used by @{username} (ID: {user_id}) for address: {address[:10]}... ({len(positions)} positions)")
+            username = user.username or "Unknown"
+            self.logger.info(f"Public /check used by @{username} (ID: {user.id}) for address: {address[:10]}... ({len(positions)} positions)")
             
         except Exception as e:
             self.logger.error(f"Error checking positions for {address}: {e}")
             await loading_message.edit_text(
                 f"❌ Error checking positions\n\n"
                 f"Failed to fetch data for address:\n"
-                f"{address[:10]}...{address[-8:]}\n\n"
+                f"{_display_address(address)}\n\n"
                 f"This could be due to:\n"
                 f"• Network connectivity issues\n"
                 f"• API rate limiting\n"
@@ -231,30 +306,43 @@ class WhaleTrackerCommandHandler:
         user = query.from_user
         self.notifier.add_user(user.id, user.username, user.first_name)
         
-        # Parse the callback data
-        callback_data = query.data
+        # Decode the action and address from the button's callback_data
+        data = query.data or ""
+        if data.startswith(("check_", "remove_")):
+            # Buttons on /list messages sent before the short format
+            action, _, address = data.partition("_")
+        else:
+            action, address = _BUTTON_ACTIONS.get(data[:1]), "0x" + data[1:]
         
-        if callback_data.startswith("check_"):
-            await self._handle_check_button(query, callback_data)
-        elif callback_data.startswith("remove_"):
-            await self._handle_remove_button(query, callback_data)
+        if not self.notifier._validate_address(address):
+            await query.edit_message_text("❌ Unknown button action")
+        elif action == "check":
+            await self._handle_check_button(query, address)
+        elif action == "remove":
+            await self._handle_remove_button(query, address)
         else:
             await query.edit_message_text("❌ Unknown button action")
     
-    async def _handle_check_button(self, query, callback_data: str):
+    async def _handle_check_button(self, query, address: str):
         """Handle check button press"""
-        # Extract address from callback data
-        address = callback_data.replace("check_", "")
-        
-        # Show loading message
-        await query.edit_message_text("🔍 Checking positions for address...\n\n⏳ Please wait...")
+        # Show loading message while the positions are fetched
+        loading_edit = asyncio.create_task(
+            query.edit_message_text("🔍 Checking positions for address...\n\n⏳ Please wait...")
+        )
         
+        # Fetch and edit in the background
+        self._spawn(self._finish_check_button(query, address, loading_edit))
+    
+    async def _finish_check_button(self, query, address: str, loading_edit: asyncio.Task):
+        """Fetch positions and replace the button's loading message with the result"""
         try:
             # Get positions for the address
             positions = await self._get_address_positions(address)
             
-            # Format and send response
+            # Format and send response once the loading edit has landed,
+            # so it can't overwrite the result
             response = self._format_positions_response(address, positions)
+            await asyncio.gather(loading_edit, return_exceptions=True)
             await query.edit_message_text(response)
             
             # Log the action
@@ -264,10 +352,11 @@ class WhaleTrackerCommandHandler:
             
         except Exception as e:
             self.logger.error(f"Error checking positions via button for {address}: {e}")
+            await asyncio.gather(loading_edit, return_exceptions=True)
             await query.edit_message_text(
                 f"❌ Error checking positions\n\n"
                 f"Failed to fetch data for address:\n"
-                f"{address[:10]}...{address[-8:]}\n\n"
+                f"{_display_address(address)}\n\n"
                 f"This could be due to:\n"
                 f"• Network connectivity issues\n"
                 f"• API rate limiting\n"
@@ -276,39 +365,31 @@ class WhaleTrackerCommandHandler:
                 f"💡 Try /check {address} for a fresh attempt"
             )
     
-    async def _handle_remove_button(self, query, callback_data: str):
+    async def _handle_remove_button(self, query, address: str):
         """Handle remove button press"""
-        # Extract address from callback data
-        address = callback_data.replace("remove_", "")
+        # Remove from dynamic addresses
+        label = await self.notifier.remove_dynamic_address(address)
         
-        # Check if address is being tracked
-        if address not in self.notifier.dynamic_addresses:
+        # Check if address was being tracked
+        if label is None:
             await query.edit_message_text(
                 f"⚠️ Address not found\n\n"
-                f"Address {address[:10]}...{address[-8:]} is not being tracked.\n\n"
+                f"Address {_display_address(address)} is not being tracked.\n\n"
                 f"💡 Use /list to see current tracked addresses"
             )
             return
         
-        # Get label before removal
-        all_labels = self.notifier.get_all_address_labels()
-        label = all_labels.get(address, f"{address[:6]}...{address[-4:]}")
-        
-        # Remove from dynamic addresses
-        del self.notifier.dynamic_addresses[address]
-        self.notifier._save_dynamic_addresses()
-        
         # Send confirmation
         await query.edit_message_text(
             f"✅ Address Removed Successfully!\n\n"
             f"📍 {label}\n"
-            f"📊 {address[:10]}...{address[-8:]}\n\n"
+            f"📊 {_display_address(address)}\n\n"
             f"🛑 No longer monitoring this address\n\n"
             f"💡 Use /list to see remaining tracked addresses"
         )
         
-        # Send notification to all users about removal
-        await self.notifier.send_address_removed_notification(address, label)
+        # Send notification to all users about removal in the background
+        self._spawn(self.notifier.send_address_removed_notification(address, label))
         
         # Log the action
         username = query.from_user.username or "Unknown"
@@ -335,36 +416,58 @@ class WhaleTrackerCommandHandler:
         user_id = update.message.from_user.id
         self.logger.info(f"Echo used by @{username} (ID: {user_id}): {original_text}")
     
-    def _validate_address(self, address: str) -> bool:
-        """Validate if an address looks like a valid Ethereum address"""
-        if not address:
-            return False
-        
-        # Basic Ethereum address validation
-        if not address.startswith('0x'):
-            return False
-        
-        if len(address) != 42:
-            return False
-        
-        # Check if it's hexadecimal (after 0x prefix)
-        try:
-            int(address[2:], 16)
-            return True
-        except ValueError:
-            return False
+    async def _request_user_state(self, address: str) -> dict:
+        """Fetch user state from the Hyperliquid API"""
+        payload = {"type": "clearinghouseState", "user": address}
+        async with self._http.post(f"{self.config.API_URL}/info", json=payload) as resp:
+            resp.raise_for_status()
+            return await resp.json(loads=_json_loads)
+    
+    async def _fetch_user_state(self, address: str) -> dict:
+        """Get user state, reusing a recent or in-flight request for the same address"""
+        key = address.lower()
+        
+        cached = self._user_state_cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        
+        # Join a request that is already running for this address
+        task = self._user_state_inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._request_user_state(address))
+            self._user_state_inflight[key] = task
+            task.add_done_callback(lambda _: self._user_state_inflight.pop(key, None))
+        
+        # Shielded so one caller giving up doesn't cancel the request for the others
+        user_state = await asyncio.shield(task)
+        
+        now = time.monotonic()
+        if len(self._user_state_cache) > 256:
+            self._user_state_cache = {
+                k: v for k, v in self._user_state_cache.items() if v[0] > now
+            }
+        self._user_state_cache[key] = (now + self.config.CHECK_CACHE_TTL, user_state)
+        
+        return user_state
+    
+    def _spawn(self, coro):
+        """Run a coroutine in the background, keeping a reference until it finishes"""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_task_done)
+        return task
+    
+    def _background_task_done(self, task: asyncio.Task):
+        """Forget a finished background task and log any exception it raised"""
+        self._background_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.logger.error(f"Background task failed: {task.exception()!r}")
     
     async def _get_address_positions(self, address: str) -> dict:
         """Get current positions for a specific address using Hyperliquid API"""
-        from hyperliquid.info import Info
-        from decimal import Decimal
-        
         try:
-            # Initialize info client
-            info_client = Info(self.config.API_URL, skip_ws=True)
-            
-            # Get user state from Hyperliquid API
-            user_state = info_client.user_state(address)
+            # Get user state from Hyperliquid API (cached briefly)
+            user_state = await self._fetch_user_state(address)
             
             positions = {}
             
@@ -376,14 +479,16 @@ class WhaleTrackerCommandHandler:
             for pos_data in user_state['assetPositions']:
                 position = pos_data['position']
                 
+                # Values are only displayed, so float precision is enough
+                size = float(position['szi'])
+                
                 # Skip if position size is zero
-                if float(position['szi']) == 0:
+                if size == 0:
                     continue
                 
                 symbol = position['coin']
-                size = Decimal(position['szi'])
-                entry_price = Decimal(position['entryPx']) if position['entryPx'] else Decimal('0')
-                unrealized_pnl = Decimal(position['unrealizedPnl'])
+                entry_price = float(position['entryPx']) if position['entryPx'] else 0.0
+                unrealized_pnl = float(position['unrealizedPnl'])
                 
                 # Calculate market value
                 market_value = abs(size) * entry_price
@@ -410,29 +515,35 @@ class WhaleTrackerCommandHandler:
     def _format_positions_response(self, address: str, positions: dict) -> str:
         """Format positions data for Telegram response"""
         # Get address label if it exists in tracked addresses
-        labels = self.notifier.get_all_address_labels()
-        address_label = labels.get(address, f"{address[:6]}...{address[-4:]}")
+        _, labels = self.notifier.snapshot()
+        address_label = labels.get(address, short_address_label(address))
         
         # Build response message
-        message = f"📊 Position Check Results\n\n"
-        message += f"📍 {address_label}\n"
-        message += f"🔗 View on Hyperdash: https://hyperdash.info/trader/{address}\n\n"
+        parts = [
+            f"📊 Position Check Results\n\n"
+            f"📍 {address_label}\n"
+            f"🔗 View on Hyperdash: https://hyperdash.info/trader/{address}\n\n"
+        ]
         
         if not positions:
-            message += f"❌ No Open Positions\n\n"
-            message += f"This address currently has no open positions on Hyperliquid.\n\n"
-            message += f"💡 Note: This could mean:\n"
-            message += f"• Address has no trading activity\n"
-            message += f"• All positions have been closed\n"
-            message += f"• Address is not active on Hyperliquid"
+            parts.append(
+                f"❌ No Open Positions\n\n"
+                f"This address currently has no open positions on Hyperliquid.\n\n"
+                f"💡 Note: This could mean:\n"
+                f"• Address has no trading activity\n"
+                f"• All positions have been closed\n"
+                f"• Address is not active on Hyperliquid"
+            )
         else:
             # Calculate total portfolio value
             total_value = sum(pos['market_value'] for pos in positions.values())
             total_pnl = sum(pos['unrealized_pnl'] for pos in positions.values())
             
-            message += f"✅ {len(positions)} Open Position(s)\n"
-            message += f"💰 Total Value: ${total_value:,.2f}\n"
-            message += f"📈 Total PnL: ${total_pnl:+,.2f}\n\n"
+            parts.append(
+                f"✅ {len(positions)} Open Position(s)\n"
+                f"💰 Total Value: ${total_value:,.2f}\n"
+                f"📈 Total PnL: ${total_pnl:+,.2f}\n\n"
+            )
             
             # Sort positions by market value (largest first)
             sorted_positions = sorted(positions.values(), key=lambda x: x['market_value'], reverse=True)
@@ -441,22 +552,37 @@ class WhaleTrackerCommandHandler:
             for i, pos in enumerate(sorted_positions, 1):
                 side_emoji = "🟢" if pos['side'] == 'long' else "🔴"
                 
-                message += f"{side_emoji} {pos['symbol']} {pos['side'].upper()}\n"
-                message += f"📦 Size: {pos['size']:.4f}\n"
-                message += f"💵 Entry: ${pos['entry_price']:,.2f}\n"
-                message += f"💰 Value: ${pos['market_value']:,.2f}\n"
-                message += f"📊 PnL: ${pos['unrealized_pnl']:+,.2f}\n"
+                parts.append(_POS_FMT(
+                    emoji=side_emoji,
+                    sym=pos['symbol'],
+                    side=pos['side'].upper(),
+                    size=pos['size'],
+                    entry=pos['entry_price'],
+                    val=pos['market_value'],
+                    pnl=pos['unrealized_pnl']
+                ))
                 
                 # Add separator if not the last position
                 if i < len(sorted_positions):
-                    message += "\n━━━━━━━━━━━━━━━━━━━━\n\n"
+                    parts.append("\n━━━━━━━━━━━━━━━━━━━━\n\n")
         
         # Add timestamp
-        from datetime import datetime
-        message += f"\n🕐 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        parts.append(f"\n🕐 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        
+        message = "".join(parts)
         
         return message
     
+    def _install_signal_handlers(self):
+        """Stop the command handler on SIGINT/SIGTERM"""
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self._stop_event.set)
+            except (NotImplementedError, RuntimeError):
+                # Not supported on Windows - Ctrl+C raises KeyboardInterrupt instead
+                pass
+    
     async def start_command_handler(self):
         """Start the command handler"""
         try:
@@ -464,23 +590,54 @@ class WhaleTrackerCommandHandler:
                 self.logger.error("Telegram bot token not configured")
                 return
             
-            # Create application with timeout settings
-            self.application = Application.builder().token(self.config.TELEGRAM_BOT_TOKEN).build()
+            # Check webhook settings before anything is started
+            if self.config.TELEGRAM_MODE == "webhook" and not self.config.WEBHOOK_BASE:
+                self.logger.error("TELEGRAM_MODE=webhook requires WEBHOOK_BASE to be set")
+                return
+            
+            # Create application; updates are processed concurrently so a slow
+            # /check doesn't hold up commands from other users
+            builder = (
+                Application.builder()
+                .token(self.config.TELEGRAM_BOT_TOKEN)
+                .concurrent_updates(True)
+            )
+            
+            # Reuse the notifier's connection pool for replies and getUpdates so
+            # there is only one set of connections to api.telegram.org
+            if self.notifier.request is not None:
+                builder = builder.request(self.notifier.request).get_updates_request(self.notifier.request)
+            else:
+                # Notifier has no client (alerts disabled): size our own pool the same way
+                builder = (
+                    builder
+                    .connection_pool_size(self.config.TELEGRAM_BROADCAST_CONCURRENCY * 2)
+                    .pool_timeout(30.0)
+                    .get_updates_pool_timeout(30.0)
+                )
+            
+            self.application = builder.build()
+            
+            # Only dispatch new messages - edited messages have no update.message
+            # and are filtered out by PTB before any handler is invoked
+            new_messages = filters.UpdateType.MESSAGE
             
             # Add command handlers
-            self.application.add_handler(CommandHandler("add", self.add_command))
-            self.application.add_handler(CommandHandler("remove", self.remove_command))
-            self.application.add_handler(CommandHandler("list", self.list_command))
-            self.application.add_handler(CommandHandler("check", self.check_command))
-            self.application.add_handler(CommandHandler("help", self.help_command))
-            self.application.add_handler(CommandHandler("start", self.start_command))
+            self.application.add_handler(CommandHandler("add", self.add_command, filters=new_messages))
+            self.application.add_handler(CommandHandler("remove", self.remove_command, filters=new_messages))
+            self.application.add_handler(CommandHandler("list", self.list_command, filters=new_messages))
+            self.application.add_handler(CommandHandler("check", self.check_command, filters=new_messages))
+            self.application.add_handler(CommandHandler("help", self.help_command, filters=new_messages))
+            self.application.add_handler(CommandHandler("start", self.start_command, filters=new_messages))
             
             # Add callback handler for button presses
             self.application.add_handler(CallbackQueryHandler(self.button_callback))
             
             # Add message handler for echo functionality
             # This handles all text messages that are not commands
-            self.application.add_handler(MessageHandler(filters.TEXT & (~filters.COMMAND), self.echo_message))
+            self.application.add_handler(
+                MessageHandler(new_messages & filters.TEXT & (~filters.COMMAND), self.echo_message)
+            )
             
             self.logger.info("🤖 Telegram command handler started")
             self.logger.info("🌍 All commands available to everyone: /add, /remove, /list, /check, /help, /start")
@@ -488,6 +645,13 @@ class WhaleTrackerCommandHandler:
             self.logger.info("🔄 Echo functionality enabled for everyone")
             self.logger.info("💡 Use /help in Telegram for usage instructions")
             
+            # Non-blocking client for /check lookups, shared by all handlers
+            self._http = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=10),
+                connector=aiohttp.TCPConnector(limit=50),
+                json_serialize=_json_dumps
+            )
+            
             # Start the bot with better error handling
             try:
                 await self.application.initialize()
@@ -498,18 +662,38 @@ class WhaleTrackerCommandHandler:
                 bot_info = await self.application.bot.get_me()
                 self.logger.info(f"✅ Connected as: @{bot_info.username}")
                 
-                # Start polling
-                self.logger.info("🔄 Starting polling for commands...")
-                await self.application.updater.start_polling(
-                    drop_pending_updates=True,
-                    timeout=30
-                )
+                # Pending updates are kept so commands sent while the handler was
+                # down (e.g. /add during a restart) are still processed. Telegram
+                # stores the confirmed offset server-side, so nothing is replayed twice
+                if self.config.TELEGRAM_MODE == "webhook":
+                    # Let Telegram push updates instead of long polling
+                    self.logger.info(f"🌐 Starting webhook for commands on port {self.config.WEBHOOK_PORT}...")
+                    await self.application.updater.start_webhook(
+                        listen="0.0.0.0",
+                        port=self.config.WEBHOOK_PORT,
+                        url_path=self.config.TELEGRAM_BOT_TOKEN,
+                        webhook_url=f"{self.config.WEBHOOK_BASE}/{self.config.TELEGRAM_BOT_TOKEN}",
+                        secret_token=self.config.WEBHOOK_SECRET or secrets.token_urlsafe(32),
+                        drop_pending_updates=False,
+                        allowed_updates=_ALLOWED_UPDATES
+                    )
+                else:
+                    # Start polling
+                    self.logger.info("🔄 Starting polling for commands...")
+                    # 50s is Telegram's maximum long-poll timeout; re-poll immediately
+                    await self.application.updater.start_polling(
+                        drop_pending_updates=False,
+                        timeout=50,
+                        poll_interval=0.0,
+                        allowed_updates=_ALLOWED_UPDATES
+                    )
                 
                 self.logger.info("✅ Command handler is now listening for commands!")
                 
-                # Keep running
-                while True:
-                    await asyncio.sleep(1)
+                # Keep running until a shutdown signal arrives
+                self._install_signal_handlers()
+                await self._stop_event.wait()
+                self.logger.info("📴 Command handler stop requested")
                     
             except Exception as startup_error:
                 self.logger.error(f"Failed to start bot: {startup_error}")
@@ -519,8 +703,6 @@ class WhaleTrackerCommandHandler:
                 self.logger.error("• Firewall blocking Telegram API")
                 raise
                 
-        except KeyboardInterrupt:
-            self.logger.info("📴 Command handler stopped by user")
         except Exception as e:
             self.logger.error(f"❌ Error in command handler: {e}")
         finally:
@@ -528,15 +710,39 @@ class WhaleTrackerCommandHandler:
                 try:
                     self.logger.info("🛑 Stopping command handler...")
                     await self.application.updater.stop()
+                    
+                    # Let in-flight checks and broadcasts finish while the bot can still send
+                    if self._background_tasks:
+                        await asyncio.wait(self._background_tasks, timeout=15)
                     await self.application.stop()
                     await self.application.shutdown()
                     self.logger.info("✅ Command handler stopped cleanly")
                 except Exception as cleanup_error:
                     self.logger.error(f"Error during cleanup: {cleanup_error}")
+            
+            # Write out any address and user changes still waiting to be saved
+            await self.notifier.stop_address_persistence()
+            await self.notifier.stop_user_persistence()
+            
+            if self._http is not None:
+                await self._http.close()
 
 
 async def main():
     """Main function"""
+    # Set up logging once for the whole process
+    logging.basicConfig(
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        level=logging.INFO
+    )
+    
+    # Development aid: report handlers that block the event loop
+    if Config.DEBUG_ASYNC:
+        loop = asyncio.get_running_loop()
+        loop.set_debug(True)
+        loop.slow_callback_duration = Config.ASYNC_SLOW_CALLBACK_MS / 1000
+        print(f"🐢 Logging event loop callbacks slower than {Config.ASYNC_SLOW_CALLBACK_MS}ms")
+    
     print("🤖 Starting Telegram Command Handler for Whale Tracker")
     print("=" * 60)
     print("📋 This handler enables these Telegram commands:")
@@ -559,4 +765,6 @@ async def main():
 
 
 if __name__ == "__main__":
+    if uvloop:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
     asyncio.run(main()) 
\ No newline at end of file
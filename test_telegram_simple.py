@@ -6,6 +6,7 @@ Test if the bot can receive and respond to commands
 
 import asyncio
 import logging
+import signal
 from telegram import Update
 from telegram.ext import Application, CommandHandler, ContextTypes
 import os
@@ -104,9 +105,17 @@ async def main():
         print()
         print("Press Ctrl+C to stop...")
         
-        # Keep running
-        while True:
-            await asyncio.sleep(1)
+        # Keep running until Ctrl+C / SIGTERM, without waking up in between
+        stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop_event.set)
+            except (NotImplementedError, RuntimeError):
+                # Not supported on Windows - Ctrl+C raises KeyboardInterrupt instead
+                pass
+        await stop_event.wait()
+        print("\n📴 Bot stopped by user")
             
     except KeyboardInterrupt:
         print("\n📴 Bot stopped by user")
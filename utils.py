@@ -3,180 +3,310 @@ Utility functions for the Hyperliquid Whale Tracker
 """
 
 import asyncio
+import decimal
+import io
+import json
+import random
+import re
 import sys
+import aiohttp
+from dataclasses import dataclass, field, replace
 from typing import List, Dict, Any, Optional
 from decimal import Decimal
 
-from hyperliquid.info import Info
 from config import Config
-from telegram_bot import get_telegram_notifier
+
+try:
+    import orjson  # Faster parsing of API responses
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# 0x prefix followed by exactly 40 hex characters
+_ADDR_RE = re.compile(r"^0x[0-9a-fA-F]{40}\Z")
+
+_ZERO = Decimal('0')
+
+# 18 significant digits is plenty for position sizes and USD values and keeps
+# Decimal arithmetic cheaper than the default 28
+_CTX = decimal.Context(prec=18)
+
+# Retries for /info requests rejected with HTTP 429
+_MAX_RATE_LIMIT_RETRIES = 3
+
+
+def _short_address(address: str) -> str:
+    """Shortened address for display, e.g. 0x1234...abcd"""
+    return f"{address[:6]}...{address[-4:]}"
+
+
+@dataclass(slots=True)
+class AddressResult:
+    """Result of testing a single address"""
+    address: str
+    valid: bool
+    error: Optional[str] = None
+    has_positions: bool = False
+    position_count: int = 0
+    total_value: Decimal = _ZERO
+    # Open positions stored column-wise; entry i of each list is one position
+    symbols: List[str] = field(default_factory=list)
+    sides: List[str] = field(default_factory=list)
+    sizes: List[str] = field(default_factory=list)
+    entry_prices: List[str] = field(default_factory=list)
+    market_values: List[str] = field(default_factory=list)
+    unrealized_pnls: List[str] = field(default_factory=list)
+    short_addr: str = field(init=False)
+    
+    def __post_init__(self):
+        self.short_addr = _short_address(self.address)
 
 
 class TrackerUtils:
     """Utility class for tracker operations"""
     
     def __init__(self):
-        self.info_client = None
+        # One HTTP session for all API calls, so connections are reused
+        self.session: Optional[aiohttp.ClientSession] = None
+        
+        # Loop time of the next free request slot (see _wait_for_request_slot)
+        self._next_request_at = 0.0
     
     async def initialize(self):
         """Initialize the API client"""
+        self.session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=10),
+            connector=aiohttp.TCPConnector(
+                limit=Config.ADDRESS_CHECK_CONCURRENCY * 2,
+                ttl_dns_cache=300,
+                keepalive_timeout=60
+            )
+        )
         try:
-            self.info_client = Info(Config.API_URL, skip_ws=True)
+            # Cheap request to confirm the API is reachable
+            await self._post_info({"type": "meta"})
             print(f"✅ Connected to {Config.API_URL}")
         except Exception as e:
             print(f"❌ Failed to connect: {e}")
             raise
     
-    def validate_address(self, address: str) -> bool:
-        """Validate if an address looks like a valid Ethereum address"""
-        if not address:
-            return False
-        
-        # Basic Ethereum address validation
-        if not address.startswith('0x'):
-            return False
+    async def close(self):
+        """Release the API client's HTTP connections"""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+    
+    async def _wait_for_request_slot(self):
+        """Pace API requests to INFO_REQUESTS_PER_SECOND across concurrent checks"""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
         
-        if len(address) != 42:
-            return False
+        # Claim the next slot before sleeping so concurrent checks queue up behind it
+        slot = max(now, self._next_request_at)
+        self._next_request_at = slot + 1.0 / Config.INFO_REQUESTS_PER_SECOND
         
-        # Check if it's hexadecimal
-        try:
-            int(address[2:], 16)
-            return True
-        except ValueError:
-            return False
+        if slot > now:
+            await asyncio.sleep(slot - now)
     
-    async def check_address_activity(self, address: str) -> Dict[str, Any]:
+    async def _post_info(self, body: Dict[str, Any]) -> Any:
+        """POST a query to the Hyperliquid /info endpoint and return the decoded JSON"""
+        for attempt in range(_MAX_RATE_LIMIT_RETRIES + 1):
+            await self._wait_for_request_slot()
+            async with self.session.post(f"{Config.API_URL}/info", json=body) as resp:
+                if resp.status != 429 or attempt == _MAX_RATE_LIMIT_RETRIES:
+                    resp.raise_for_status()
+                    return await resp.json(loads=_json_loads)
+                retry_after = resp.headers.get('Retry-After')
+            
+            # Rate limited: honor Retry-After when given, else back off
+            # exponentially with jitter
+            try:
+                delay = float(retry_after)
+            except (TypeError, ValueError):
+                delay = 2 ** attempt + random.random()
+            await asyncio.sleep(delay)
+    
+    def validate_address(self, address: str) -> bool:
+        """Validate if an address looks like a valid Ethereum address"""
+        return bool(address) and _ADDR_RE.match(address) is not None
+    
+    async def check_address_activity(self, address: str) -> AddressResult:
         """Check if an address has any trading activity on Hyperliquid"""
         try:
-            user_state = self.info_client.user_state(address)
+            user_state = await self._post_info({"type": "clearinghouseState", "user": address})
             
-            result = {
-                'address': address,
-                'valid': True,
-                'has_positions': False,
-                'position_count': 0,
-                'total_value': Decimal('0'),
-                'positions': []
-            }
+            result = AddressResult(address=address, valid=True)
             
             if user_state and 'assetPositions' in user_state:
-                active_positions = []
-                total_value = Decimal('0')
+                total_value = _ZERO
                 
-                for pos_data in user_state['assetPositions']:
-                    position = pos_data['position']
-                    
-                    # Skip zero positions
-                    if float(position['szi']) == 0:
-                        continue
-                    
-                    symbol = position['coin']
-                    size = Decimal(position['szi'])
-                    entry_price = Decimal(position['entryPx']) if position['entryPx'] else Decimal('0')
-                    unrealized_pnl = Decimal(position['unrealizedPnl'])
-                    
-                    market_value = abs(size) * entry_price
-                    total_value += market_value
-                    
-                    side = "long" if size > 0 else "short"
-                    
-                    active_positions.append({
-                        'symbol': symbol,
-                        'side': side,
-                        'size': str(abs(size)),
-                        'entry_price': str(entry_price),
-                        'market_value': str(market_value),
-                        'unrealized_pnl': str(unrealized_pnl)
-                    })
+                # Parse and compute under the reduced-precision context
+                parse = _CTX.create_decimal
+                with decimal.localcontext(_CTX):
+                    for pos_data in user_state['assetPositions']:
+                        position = pos_data['position']
+                        
+                        # Parse the size once and reuse it for the zero check
+                        size = parse(position['szi'])
+                        
+                        # Skip zero positions
+                        if size == _ZERO:
+                            continue
+                        
+                        symbol = position['coin']
+                        entry_price = parse(position['entryPx']) if position['entryPx'] else _ZERO
+                        unrealized_pnl = parse(position['unrealizedPnl'])
+                        
+                        abs_size = abs(size)
+                        market_value = abs_size * entry_price
+                        total_value += market_value
+                        
+                        side = "long" if size > 0 else "short"
+                        
+                        result.symbols.append(symbol)
+                        result.sides.append(side)
+                        result.sizes.append(str(abs_size))
+                        result.entry_prices.append(str(entry_price))
+                        result.market_values.append(str(market_value))
+                        result.unrealized_pnls.append(str(unrealized_pnl))
                 
-                result['has_positions'] = len(active_positions) > 0
-                result['position_count'] = len(active_positions)
-                result['total_value'] = total_value
-                result['positions'] = active_positions
+                result.position_count = len(result.symbols)
+                result.has_positions = result.position_count > 0
+                result.total_value = total_value
             
             return result
             
         except Exception as e:
-            return {
-                'address': address,
-                'valid': False,
-                'error': str(e),
-                'has_positions': False,
-                'position_count': 0,
-                'total_value': Decimal('0'),
-                'positions': []
-            }
+            return AddressResult(address=address, valid=False, error=str(e))
     
-    async def test_addresses(self, addresses: List[str]) -> List[Dict[str, Any]]:
+    async def test_addresses(self, addresses: List[str]) -> List[AddressResult]:
         """Test multiple addresses and return their status"""
-        results = []
+        total = len(addresses)
         
-        print(f"🔍 Testing {len(addresses)} addresses...")
+        print(f"🔍 Testing {total} addresses...")
         print("-" * 60)
         
-        for i, address in enumerate(addresses, 1):
-            print(f"Testing {i}/{len(addresses)}: {address[:10]}...")
-            
-            # Validate address format
-            if not self.validate_address(address):
-                results.append({
-                    'address': address,
-                    'valid': False,
-                    'error': 'Invalid address format',
-                    'has_positions': False,
-                    'position_count': 0,
-                    'total_value': Decimal('0'),
-                    'positions': []
-                })
-                continue
-            
-            # Check activity
-            result = await self.check_address_activity(address)
-            results.append(result)
-            
-            # Small delay to avoid rate limiting
-            await asyncio.sleep(1)
+        # Sort out badly formatted addresses first, so only valid ones hit the API
+        results: List[Optional[AddressResult]] = [None] * total
+        valid_indexes = []
+        lines = []
+        push = lines.append
+        for i, address in enumerate(addresses):
+            if self.validate_address(address):
+                push(f"Queued {i + 1}/{total}: {address[:10]}...")
+                valid_indexes.append(i)
+            else:
+                push(f"Skipped {i + 1}/{total}: {address[:10]}... (invalid format)")
+                results[i] = AddressResult(address=address, valid=False, error='Invalid address format')
+        
+        # List which addresses are queued for checking, in a single write
+        # before any request starts
+        if lines:
+            sys.stdout.write("\n".join(lines))
+            sys.stdout.write("\n")
+        
+        # Limit in-flight API calls so large lists don't trip rate limiting
+        semaphore = asyncio.Semaphore(Config.ADDRESS_CHECK_CONCURRENCY)
+        
+        async def check_one(address: str) -> AddressResult:
+            async with semaphore:
+                # A slow address gets an error result instead of stalling the scan
+                try:
+                    async with asyncio.timeout(Config.ADDRESS_CHECK_TIMEOUT):
+                        return await self.check_address_activity(address)
+                except TimeoutError:
+                    return AddressResult(
+                        address=address,
+                        valid=False,
+                        error=f"Timed out after {Config.ADDRESS_CHECK_TIMEOUT}s"
+                    )
+        
+        # Check each account once, even if it is listed several times; addresses
+        # are case-insensitive, so 0xAB... and 0xab... are the same account
+        unique_addresses = {}
+        for i in valid_indexes:
+            unique_addresses.setdefault(addresses[i].lower(), addresses[i])
+        
+        # The task group waits for every check and cancels the rest if one fails
+        async with asyncio.TaskGroup() as tg:
+            tasks = {
+                key: tg.create_task(check_one(address))
+                for key, address in unique_addresses.items()
+            }
+        
+        # Put the checked results back in input order, duplicates included. Each
+        # duplicate gets its own AddressResult carrying the address as listed;
+        # the position lists are shared with the first occurrence's result
+        first_results: Dict[str, AddressResult] = {}
+        for i in valid_indexes:
+            address = addresses[i]
+            key = address.lower()
+            task = tasks.pop(key, None)
+            if task is not None:
+                first_results[key] = results[i] = task.result()
+            else:
+                results[i] = replace(first_results[key], address=address)
         
         return results
     
-    def print_address_report(self, results: List[Dict[str, Any]]):
+    def print_address_report(self, results: List[AddressResult]):
         """Print a formatted report of address testing results"""
-        print("\n" + "="*80)
-        print("📊 ADDRESS TESTING REPORT")
-        print("="*80)
+        # Build the whole report in memory and write it to stdout once
+        buf = io.StringIO()
+        w = buf.write
         
-        valid_count = sum(1 for r in results if r['valid'])
-        active_count = sum(1 for r in results if r['has_positions'])
-        total_value = sum(r['total_value'] for r in results if r['valid'])
+        w("\n" + "="*80 + "\n")
+        w("📊 ADDRESS TESTING REPORT\n")
+        w("="*80 + "\n")
         
-        print(f"✅ Valid addresses: {valid_count}/{len(results)}")
-        print(f"📈 Addresses with positions: {active_count}/{len(results)}")
-        print(f"💰 Total position value: ${total_value:,.2f}")
-        print()
+        # Summary totals in a single pass over the results
+        valid_count = 0
+        active_count = 0
+        total_value = _ZERO
+        for r in results:
+            if r.valid:
+                valid_count += 1
+                total_value += r.total_value
+            if r.has_positions:
+                active_count += 1
+        
+        w(f"✅ Valid addresses: {valid_count}/{len(results)}\n")
+        w(f"📈 Addresses with positions: {active_count}/{len(results)}\n")
+        w(f"💰 Total position value: ${total_value:,.2f}\n")
+        w("\n")
         
         for result in results:
-            address = result['address']
-            short_addr = f"{address[:6]}...{address[-4:]}"
+            short_addr = result.short_addr
             
-            if not result['valid']:
-                print(f"❌ {short_addr}: {result.get('error', 'Invalid')}")
+            if not result.valid:
+                w(f"❌ {short_addr}: {result.error or 'Invalid'}\n")
                 continue
             
-            if result['has_positions']:
-                print(f"🟢 {short_addr}: {result['position_count']} positions, ${result['total_value']:,.2f}")
-                for pos in result['positions']:
-                    print(f"   └─ {pos['symbol']} {pos['side'].upper()}: ${pos['market_value']}")
+            if result.has_positions:
+                w(f"🟢 {short_addr}: {result.position_count} positions, ${result.total_value:,.2f}\n")
+                w("".join(
+                    f"   └─ {symbol} {side.upper()}: ${market_value}\n"
+                    for symbol, side, market_value in zip(result.symbols, result.sides, result.market_values)
+                ))
             else:
-                print(f"⚪ {short_addr}: No active positions")
+                w(f"⚪ {short_addr}: No active positions\n")
         
-        print("\n" + "="*80)
+        w("\n" + "="*80 + "\n")
         
         if active_count > 0:
-            print("✅ Ready to track! Add these addresses to config.py")
+            w("✅ Ready to track! Add these addresses to config.py\n")
         else:
-            print("⚠️  No addresses with active positions found.")
-            print("   Try adding addresses of known active traders.")
+            w("⚠️  No addresses with active positions found.\n")
+            w("   Try adding addresses of known active traders.\n")
+        
+        sys.stdout.write(buf.getvalue())
+        sys.stdout.flush()
+
+
+async def _probe_service(session: aiohttp.ClientSession, url: str):
+    """Send a HEAD request to a service; any HTTP response means it is reachable"""
+    async with session.head(url) as resp:
+        return resp.status
 
 
 async def test_network_connectivity():
@@ -184,9 +314,6 @@ async def test_network_connectivity():
     print("🌐 Testing Network Connectivity...")
     print("-" * 60)
     
-    import subprocess
-    import sys
-    
     services = {
         'Hyperliquid API': 'https://api.hyperliquid.xyz',
         'Telegram API': 'https://api.telegram.org'
@@ -194,31 +321,28 @@ async def test_network_connectivity():
     
     results = {}
     
-    for service_name, url in services.items():
-        try:
-            result = subprocess.run(
-                ['curl', '-s', '--connect-timeout', '10', url],
-                capture_output=True,
-                timeout=15
-            )
-            
-            if result.returncode == 0:
-                print(f"✅ Can reach {service_name}")
-                results[service_name] = True
-            else:
-                print(f"❌ Cannot reach {service_name}")
-                print(f"   curl exit code: {result.returncode}")
-                results[service_name] = False
-                
-        except subprocess.TimeoutExpired:
+    # Probe all services at once
+    timeout = aiohttp.ClientTimeout(total=15, connect=10)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        responses = await asyncio.gather(
+            *(_probe_service(session, url) for url in services.values()),
+            return_exceptions=True
+        )
+    
+    for service_name, response in zip(services, responses):
+        if isinstance(response, asyncio.TimeoutError):
             print(f"❌ Connection timeout to {service_name}")
             results[service_name] = False
-        except FileNotFoundError:
-            print("ℹ️  curl not available for testing")
-            return None
-        except Exception as e:
-            print(f"❌ Network test error for {service_name}: {e}")
+        elif isinstance(response, aiohttp.ClientError):
+            print(f"❌ Cannot reach {service_name}")
+            print(f"   {type(response).__name__}: {response}")
+            results[service_name] = False
+        elif isinstance(response, Exception):
+            print(f"❌ Network test error for {service_name}: {response}")
             results[service_name] = False
+        else:
+            print(f"✅ Can reach {service_name}")
+            results[service_name] = True
     
     print("\n🔍 Summary:")
     all_ok = all(results.values())
@@ -241,9 +365,7 @@ async def test_telegram_bot():
     
     # First test network connectivity
     network_results = await test_network_connectivity()
-    if network_results is None:
-        print("\n⚠️  Cannot test network connectivity (curl not available)")
-    elif not network_results.get('Telegram API', False):
+    if not network_results.get('Telegram API', False):
         print("\n⚠️  Telegram API unreachable.")
         print("   Telegram notifications will not work in this environment.")
         print("   The whale tracker will still work without Telegram notifications.")
@@ -273,6 +395,9 @@ async def test_telegram_bot():
     
     # Test bot connection
     try:
+        # Imported here so the other commands don't load the Telegram stack
+        from telegram_bot import get_telegram_notifier
+        
         notifier = get_telegram_notifier()
         
         if not notifier.enabled:
@@ -381,6 +506,9 @@ python utils.py test-network
     
     except Exception as e:
         print(f"❌ Error: {e}")
+    
+    finally:
+        await utils.close()
 
 
 if __name__ == "__main__":